@@ -156,6 +156,7 @@ class Config:
     telegram_action_command_timeout_sec: float
     telegram_action_command_allowlist: List[str]
     telegram_action_command_max_lookback_days: int
+    telegram_action_ops_pool_size: int
     instance_id: str
     log_level: str
 
@@ -289,6 +290,7 @@ class Config:
             telegram_action_command_max_lookback_days=_get_env_int(
                 "TG_ACTION_COMMAND_MAX_LOOKBACK_DAYS", 30
             ),
+            telegram_action_ops_pool_size=_get_env_int("TG_ACTION_OPS_POOL_SIZE", 4),
             instance_id=os.getenv("INSTANCE_ID", "").strip(),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
         )
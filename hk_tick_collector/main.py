@@ -39,6 +39,17 @@ def _install_fault_diagnostics() -> None:
         logger.warning("faulthandler_sigusr1_register_failed")
 
 
+def _install_event_loop_policy() -> None:
+    # uvloop is optional; fall back to the stdlib loop when it is not installed.
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 async def run() -> None:
     config = Config.from_env()
     setup_logging(config.log_level)
@@ -81,6 +92,7 @@ async def run() -> None:
                 action_command_timeout_sec=config.telegram_action_command_timeout_sec,
                 action_command_allowlist=config.telegram_action_command_allowlist,
                 action_command_max_lookback_days=config.telegram_action_command_max_lookback_days,
+                action_ops_pool_size=config.telegram_action_ops_pool_size,
             )
             await notifier.start()
         except Exception:
@@ -218,6 +230,7 @@ async def run() -> None:
 
 
 def main() -> None:
+    _install_event_loop_policy()
     asyncio.run(run())
 
 
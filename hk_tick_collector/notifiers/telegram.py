@@ -1,19 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import hashlib
+import http.client
 import json
 import logging
+import math
 import re
 import secrets
 import socket
+import threading
 import time
-import urllib.error
 import urllib.parse
 import urllib.request
-from collections import deque
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field, replace
-from datetime import datetime, time as dt_time
+from datetime import datetime
 from enum import Enum
+from functools import cached_property, lru_cache
 from html import escape
 from importlib import metadata
 from pathlib import Path
@@ -43,6 +48,7 @@ logger = logging.getLogger(__name__)
 HK_TZ = ZoneInfo("Asia/Hong_Kong")
 NOTIFY_SCHEMA_VERSION = "v2.2"
 TELEGRAM_MAX_MESSAGE_CHARS = 4096
+TELEGRAM_API_HOST = "api.telegram.org"
 WARN_CADENCE_SEC = 600
 ALERT_CADENCE_SEC = 180
 PREOPEN_CADENCE_SEC = 1800
@@ -81,9 +87,12 @@ _SEVERITY_RANK = {
     NotifySeverity.WARN: 1,
     NotifySeverity.ALERT: 2,
 }
+# Indexed by _SEVERITY_RANK; every non-OK health severity shares the yellow icon.
+_SEVERITY_ICONS = ("🟢", "🟡", "🟡")
+_BACKOFF_SCHEDULE = (1.0, 2.0, 4.0, 8.0)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SymbolSnapshot:
     symbol: str
     last_tick_age_sec: float | None
@@ -114,8 +123,15 @@ class HealthSnapshot:
     system_disk_free_gb: float | None = None
     sid: str = field(default_factory=lambda: _make_short_id("sid"))
 
+    @cached_property
+    def max_symbol_age_sec(self) -> float | None:
+        ages = [s.last_tick_age_sec for s in self.symbols if s.last_tick_age_sec is not None]
+        if not ages:
+            return None
+        return max(ages)
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class AlertEvent:
     created_at: datetime
     code: str
@@ -133,7 +149,7 @@ class AlertEvent:
     eid: str = field(default_factory=lambda: _make_short_id("eid"))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TelegramSendResult:
     ok: bool
     status_code: int
@@ -142,14 +158,14 @@ class TelegramSendResult:
     message_id: int | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RenderedMessage:
     text: str
     parse_mode: str = "HTML"
     reply_markup: dict[str, Any] | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HealthAssessment:
     severity: NotifySeverity
     conclusion: str
@@ -158,7 +174,7 @@ class HealthAssessment:
     market_mode: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class _OutboundMessage:
     kind: str
     message: RenderedMessage
@@ -173,7 +189,7 @@ class _OutboundMessage:
     action_context_id: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class _DedupeRecord:
     first_seen_at: float
     last_seen_at: float
@@ -207,7 +223,8 @@ class SlidingWindowRateLimiter:
         self._limit = max(1, int(limit_per_window))
         self._window_sec = max(1.0, float(window_sec))
         self._now_fn = now_fn
-        self._timestamps: Deque[float] = deque()
+        # Reserved send times of the last `limit` slots, oldest first.
+        self._slots: Deque[float] = deque(maxlen=self._limit)
 
     @property
     def limit_per_window(self) -> int:
@@ -215,13 +232,116 @@ class SlidingWindowRateLimiter:
 
     def reserve_delay(self) -> float:
         now = self._now_fn()
-        while self._timestamps and (now - self._timestamps[0]) >= self._window_sec:
-            self._timestamps.popleft()
+        slots = self._slots
+        # A slot opens one window after the send `limit` slots back, so no rolling window
+        # ever holds more than `limit` sends; later callers queue behind reserved slots.
+        send_at = now if len(slots) < self._limit else max(now, slots[0] + self._window_sec)
+        slots.append(send_at)
+        return send_at - now
+
+
+def _coalesce_key(payload: _OutboundMessage) -> tuple[Any, ...] | None:
+    # Only messages that a newer one fully supersedes share a key.
+    if payload.mode == "edit" and payload.message_id is not None:
+        return ("edit", payload.chat_id, payload.message_id)
+    if payload.kind == "HEALTH":
+        return ("health", payload.fingerprint, payload.chat_id, payload.thread_id)
+    return None
+
+
+class _OutboundQueue:
+    # Single-consumer queue: a deque plus two events instead of asyncio.Queue's waiter futures.
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = max(1, int(maxsize))
+        self._items: Deque[_OutboundMessage | None] = deque()
+        self._nonempty = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._unfinished = 0
+        # Queued count per coalesce key, so a superseded message is spotted without a scan.
+        self._queued_keys: Dict[tuple[Any, ...], int] = {}
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        return len(self._items) >= self._maxsize
+
+    def put_nowait(self, item: _OutboundMessage | None) -> None:
+        if len(self._items) >= self._maxsize:
+            raise asyncio.QueueFull
+        self._append(item)
+
+    def close(self) -> None:
+        # The stop sentinel is always accepted, even past capacity.
+        self._append(None)
+
+    def _append(self, item: _OutboundMessage | None) -> None:
+        self._items.append(item)
+        key = _coalesce_key(item) if item is not None else None
+        if key is not None:
+            self._queued_keys[key] = self._queued_keys.get(key, 0) + 1
+        self._unfinished += 1
+        self._idle.clear()
+        self._nonempty.set()
+
+    def evict_lowest(self, max_rank: int) -> _OutboundMessage | None:
+        # Removes the oldest of the least severe queued items, never one above `max_rank`.
+        victim_index = -1
+        victim_rank = max_rank + 1
+        for index, item in enumerate(self._items):
+            if item is None:
+                continue
+            rank = _SEVERITY_RANK[item.severity]
+            if rank < victim_rank:
+                victim_index, victim_rank = index, rank
+        if victim_index < 0:
+            return None
+        victim = self._items[victim_index]
+        del self._items[victim_index]
+        self._release(victim)
+        self.task_done()
+        return victim
+
+    def get_nowait(self) -> _OutboundMessage | None:
+        if not self._items:
+            raise asyncio.QueueEmpty
+        return self._release(self._items.popleft())
+
+    async def get(self) -> _OutboundMessage | None:
+        while not self._items:
+            self._nonempty.clear()
+            await self._nonempty.wait()
+        return self._release(self._items.popleft())
+
+    def has_newer(self, item: _OutboundMessage) -> bool:
+        # True when a still-queued message fully supersedes `item`.
+        key = _coalesce_key(item)
+        return key is not None and key in self._queued_keys
+
+    def _release(self, item: _OutboundMessage | None) -> _OutboundMessage | None:
+        key = _coalesce_key(item) if item is not None else None
+        if key is not None:
+            remaining = self._queued_keys[key] - 1
+            if remaining:
+                self._queued_keys[key] = remaining
+            else:
+                del self._queued_keys[key]
+        return item
 
-        if len(self._timestamps) < self._limit:
-            self._timestamps.append(now)
-            return 0.0
-        return max(0.0, self._window_sec - (now - self._timestamps[0]))
+    def task_done(self) -> None:
+        if self._unfinished <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+
+    async def join(self) -> None:
+        if self._unfinished:
+            await self._idle.wait()
 
 
 def _severity_from(value: str | NotifySeverity) -> NotifySeverity:
@@ -280,63 +400,55 @@ def _resolve_collector_version() -> str:
     return PACKAGE_VERSION or "unknown"
 
 
-def _max_symbol_age_sec(snapshot: HealthSnapshot) -> float | None:
-    ages = [s.last_tick_age_sec for s in snapshot.symbols if s.last_tick_age_sec is not None]
-    if not ages:
-        return None
-    return max(ages)
-
-
-def _max_symbol_lag(snapshot: HealthSnapshot) -> int:
-    if not snapshot.symbols:
-        return 0
-    return max(max(0, item.max_seq_lag) for item in snapshot.symbols)
-
-
 def _queue_utilization_pct(snapshot: HealthSnapshot) -> float:
     if snapshot.queue_maxsize <= 0:
         return 0.0
     return (snapshot.queue_size / snapshot.queue_maxsize) * 100.0
 
 
+_TRADING_MODES = frozenset({"pre-open", "open", "lunch-break"})
+_MARKET_MODE_LABELS = {
+    "pre-open": "開盤前",
+    "open": "盤中",
+    "lunch-break": "午休",
+    "after-hours": "收盤後",
+    "holiday-closed": "休市日",
+}
+
+
 def _infer_market_mode(created_at: datetime) -> str:
     local = created_at.astimezone(HK_TZ)
     if local.weekday() >= 5:
         return "after-hours"
 
-    t = local.timetz().replace(tzinfo=None)
-    if dt_time(9, 0) <= t < dt_time(9, 30):
+    # Session boundaries fall on whole minutes, so minute-of-day comparisons are exact.
+    minute = local.hour * 60 + local.minute
+    if minute < 540:
+        return "after-hours"
+    if minute < 570:
         return "pre-open"
-    if dt_time(9, 30) <= t < dt_time(12, 0):
+    if minute < 720:
         return "open"
-    if dt_time(12, 0) <= t < dt_time(13, 0):
+    if minute < 780:
         return "lunch-break"
-    if dt_time(13, 0) <= t < dt_time(16, 0):
+    if minute < 960:
         return "open"
     return "after-hours"
 
 
 def _is_trading_mode(mode: str) -> bool:
-    return mode in {"pre-open", "open", "lunch-break"}
+    return mode in _TRADING_MODES
 
 
 def _market_mode_label(mode: str) -> str:
-    mapping = {
-        "pre-open": "開盤前",
-        "open": "盤中",
-        "lunch-break": "午休",
-        "after-hours": "收盤後",
-        "holiday-closed": "休市日",
-    }
-    return mapping.get(mode, mode)
+    return _MARKET_MODE_LABELS.get(mode, mode)
 
 
 def _is_after_close_window(created_at: datetime) -> bool:
     local = created_at.astimezone(HK_TZ)
     if local.weekday() >= 5:
         return False
-    t = local.timetz().replace(tzinfo=None)
-    return t >= dt_time(16, 0)
+    return local.hour >= 16
 
 
 def _format_duration(seconds: int | float) -> str:
@@ -420,6 +532,14 @@ def _percentile_float(values: Sequence[float], percentile: float) -> float | Non
     return float(ordered[index])
 
 
+_EXPANDABLE_START_TAG = "<blockquote expandable>"
+_EXPANDABLE_END_TAG = "</blockquote>"
+_TRUNCATED_SUFFIX = "\n... [truncated]"
+_EXPANDABLE_OVERHEAD = (
+    len(_EXPANDABLE_START_TAG) + len(_EXPANDABLE_END_TAG) + len(_TRUNCATED_SUFFIX)
+)
+
+
 def truncate_rendered_message(
     message: RenderedMessage,
     max_chars: int = TELEGRAM_MAX_MESSAGE_CHARS,
@@ -430,32 +550,36 @@ def truncate_rendered_message(
         return message
 
     if message.parse_mode.upper() == "HTML":
-        start_tag = "<blockquote expandable>"
-        end_tag = "</blockquote>"
-        start_idx = text.find(start_tag)
-        end_idx = text.rfind(end_tag)
+        start_idx = text.find(_EXPANDABLE_START_TAG)
+        end_idx = text.rfind(_EXPANDABLE_END_TAG)
         if start_idx >= 0 and end_idx > start_idx:
             head = text[:start_idx]
-            detail = text[start_idx + len(start_tag) : end_idx]
-            tail = text[end_idx + len(end_tag) :]
-            suffix = "\n... [truncated]"
-            keep = limit - len(head) - len(start_tag) - len(end_tag) - len(tail) - len(suffix)
+            detail = text[start_idx + len(_EXPANDABLE_START_TAG) : end_idx]
+            tail = text[end_idx + len(_EXPANDABLE_END_TAG) :]
+            keep = limit - len(head) - _EXPANDABLE_OVERHEAD - len(tail)
             if keep > 0:
-                clipped = detail[:keep] + suffix
+                clipped = detail[:keep] + _TRUNCATED_SUFFIX
                 return RenderedMessage(
-                    text=f"{head}{start_tag}{clipped}{end_tag}{tail}",
+                    text=f"{head}{_EXPANDABLE_START_TAG}{clipped}{_EXPANDABLE_END_TAG}{tail}",
                     parse_mode=message.parse_mode,
                 )
 
-    suffix = "\n... [truncated]"
-    keep = max(0, limit - len(suffix))
-    truncated = text[:keep] + suffix
+    keep = max(0, limit - len(_TRUNCATED_SUFFIX))
+    truncated = text[:keep] + _TRUNCATED_SUFFIX
     return RenderedMessage(text=truncated[:limit], parse_mode=message.parse_mode)
 
 
+@lru_cache(maxsize=4096)
+def _fingerprint_key(fingerprint: str) -> int:
+    normalized = fingerprint.strip() or "unknown"
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
 class DedupeStore:
-    def __init__(self) -> None:
-        self._records: Dict[str, _DedupeRecord] = {}
+    def __init__(self, *, max_entries: int = 4096) -> None:
+        self._max_entries = max(1, int(max_entries))
+        self._records: OrderedDict[int, _DedupeRecord] = OrderedDict()
 
     def evaluate(
         self,
@@ -468,12 +592,14 @@ class DedupeStore:
         event_id: str | None = None,
         snapshot_id: str | None = None,
     ) -> tuple[bool, str]:
-        key = fingerprint.strip() or "unknown"
-        steps = self._normalized_steps(escalation_steps)
+        key = _fingerprint_key(fingerprint)
+        steps = self._normalized_steps(tuple(escalation_steps))
         cooldown = max(1, int(cooldown_sec))
 
         record = self._records.get(key)
         if record is None:
+            if len(self._records) >= self._max_entries:
+                self._records.popitem(last=False)
             next_idx = self._first_positive_step_index(steps)
             self._records[key] = _DedupeRecord(
                 first_seen_at=now,
@@ -486,6 +612,7 @@ class DedupeStore:
             )
             return True, "new"
 
+        self._records.move_to_end(key)
         record.last_seen_at = now
 
         if _severity_rank(severity) > _severity_rank(record.last_sent_severity):
@@ -520,14 +647,14 @@ class DedupeStore:
         return False, "cooldown_active"
 
     def resolve(self, fingerprint: str) -> _DedupeRecord | None:
-        key = fingerprint.strip() or "unknown"
-        return self._records.pop(key, None)
+        return self._records.pop(_fingerprint_key(fingerprint), None)
 
     @staticmethod
-    def _normalized_steps(values: Sequence[int]) -> list[int]:
-        cleaned = sorted({max(0, int(item)) for item in values})
+    @lru_cache(maxsize=32)
+    def _normalized_steps(values: tuple[int, ...]) -> tuple[int, ...]:
+        cleaned = tuple(sorted({max(0, int(item)) for item in values}))
         if not cleaned:
-            return [0]
+            return (0,)
         return cleaned
 
     @staticmethod
@@ -547,9 +674,17 @@ class AlertStateMachine:
         self._holiday_closed_cycles = 0
 
     def assess_health(self, snapshot: HealthSnapshot) -> HealthAssessment:
+        ages: list[float] = []
+        max_lag = 0
+        for item in snapshot.symbols:
+            if item.last_tick_age_sec is not None:
+                ages.append(item.last_tick_age_sec)
+            if item.max_seq_lag > max_lag:
+                max_lag = item.max_seq_lag
+
         mode = _infer_market_mode(snapshot.created_at)
         if mode == "open":
-            if self._is_holiday_closed_candidate(snapshot):
+            if self._is_holiday_closed_candidate(snapshot, ages):
                 mode = "holiday-closed"
         else:
             self._holiday_closed_cycles = 0
@@ -557,7 +692,6 @@ class AlertStateMachine:
         freshness_sec = abs(snapshot.drift_sec) if snapshot.drift_sec is not None else None
         queue_pct = _queue_utilization_pct(snapshot)
         persisted = max(0, int(snapshot.persisted_rows_per_min))
-        max_lag = _max_symbol_lag(snapshot)
         queue = max(0, int(snapshot.queue_size))
 
         low_persist = False
@@ -638,7 +772,7 @@ class AlertStateMachine:
             market_mode=mode,
         )
 
-    def _is_holiday_closed_candidate(self, snapshot: HealthSnapshot) -> bool:
+    def _is_holiday_closed_candidate(self, snapshot: HealthSnapshot, ages: list[float]) -> bool:
         if (
             max(0, int(snapshot.persisted_rows_per_min)) > 0
             or max(0, int(snapshot.push_rows_per_min)) > 0
@@ -648,7 +782,6 @@ class AlertStateMachine:
             self._holiday_closed_cycles = 0
             return False
 
-        ages = _symbol_ages(snapshot)
         if not ages:
             self._holiday_closed_cycles = 0
             return False
@@ -699,6 +832,16 @@ class MessageRenderer:
     def __init__(self, *, parse_mode: str = "HTML") -> None:
         mode = (parse_mode or "HTML").strip().upper()
         self._parse_mode = "HTML" if mode == "HTML" else ""
+        self._health_headers = {
+            severity: (
+                f"<b>{_SEVERITY_ICONS[_SEVERITY_RANK[severity]]} HK Tick Collector "
+                f"{'正常' if severity == NotifySeverity.OK else '注意'}</b>"
+            )
+            for severity in NotifySeverity
+        }
+        self._health_plain_headers = {
+            severity: f"HK Tick Collector HEALTH {severity.value}" for severity in NotifySeverity
+        }
 
     @property
     def parse_mode(self) -> str:
@@ -740,7 +883,6 @@ class MessageRenderer:
         ingest_rows_per_min = _ingest_rows_per_min(snapshot)
         persisted_rows_per_min = max(0, int(snapshot.persisted_rows_per_min))
         write_efficiency = _write_efficiency_pct(snapshot)
-        icon = "🟢" if assessment.severity == NotifySeverity.OK else "🟡"
         system_line = (
             f"資源：load1={_format_float(snapshot.system_load1, 2)} "
             f"rss={_format_float(snapshot.system_rss_mb, 1)}MB "
@@ -795,7 +937,7 @@ class MessageRenderer:
             )
 
         lines = [
-            f"<b>{icon} HK Tick Collector {'正常' if assessment.severity == NotifySeverity.OK else '注意'}</b>",
+            self._health_headers[assessment.severity],
             f"結論：{escape(assessment.conclusion)}",
             escape(metrics_line),
             escape(progress_line),
@@ -920,7 +1062,7 @@ class MessageRenderer:
         ingest_rows_per_min = _ingest_rows_per_min(snapshot)
         write_efficiency = _write_efficiency_pct(snapshot)
         lines = [
-            f"HK Tick Collector HEALTH {assessment.severity.value}",
+            self._health_plain_headers[assessment.severity],
             f"結論: {assessment.conclusion}",
             (
                 f"指標: mode={_market_mode_label(assessment.market_mode)} "
@@ -1156,7 +1298,7 @@ class MessageComposer:
         )
         throughput_text = f"{max(0, int(snapshot.persisted_rows_per_min))}/min"
         queue_text = f"{snapshot.queue_size}/{snapshot.queue_maxsize}"
-        icon = "🟢" if assessment.severity == NotifySeverity.OK else "🟡"
+        icon = _SEVERITY_ICONS[_SEVERITY_RANK[assessment.severity]]
         phase_text = _market_mode_label(assessment.market_mode)
         if assessment.severity == NotifySeverity.OK and assessment.market_mode in {
             "lunch-break",
@@ -1323,6 +1465,8 @@ class TelegramClient:
         self._request_timeout_sec = max(0.5, float(request_timeout_sec))
         self._sender = sender or self._send_via_http
         self._masked_token = self._mask_secret(self._bot_token)
+        self._send_conn: http.client.HTTPSConnection | None = None
+        self._send_lock = threading.Lock()
 
     @property
     def masked_token(self) -> str:
@@ -1412,24 +1556,19 @@ class TelegramClient:
     def get_webhook_info(self) -> dict[str, Any]:
         return self._post_json(endpoint="getWebhookInfo", payload={})
 
-    def _send_via_http(self, payload: Dict[str, str | int]) -> TelegramSendResult:
-        url = f"https://api.telegram.org/bot{self._bot_token}/sendMessage"
-        encoded = urllib.parse.urlencode(payload).encode("utf-8")
-        request = urllib.request.Request(url, data=encoded, method="POST")
-        request.add_header("Content-Type", "application/x-www-form-urlencoded")
+    def close(self) -> None:
+        with self._send_lock:
+            if self._send_conn is not None:
+                self._send_conn.close()
+                self._send_conn = None
 
+    def _send_via_http(self, payload: Dict[str, str | int]) -> TelegramSendResult:
+        path = f"/bot{self._bot_token}/sendMessage"
+        encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
         try:
-            with urllib.request.urlopen(request, timeout=self._request_timeout_sec) as response:
-                body = response.read().decode("utf-8", errors="replace")
-                status = int(getattr(response, "status", response.getcode()))
-                return self._parse_send_response(status, body)
-        except urllib.error.HTTPError as exc:
-            body = ""
-            try:
-                body = exc.read().decode("utf-8", errors="replace")
-            except Exception:
-                body = ""
-            return self._parse_send_response(int(exc.code), body)
+            with self._send_lock:
+                status, body = self._post_keepalive(path=path, body=encoded)
+            return self._parse_send_response(status, body)
         except Exception as exc:
             return TelegramSendResult(
                 ok=False,
@@ -1437,6 +1576,54 @@ class TelegramClient:
                 error=f"{type(exc).__name__}: {self._sanitize_text(str(exc))}",
             )
 
+    def _post_keepalive(self, *, path: str, body: bytes) -> tuple[int, str]:
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for attempt in range(2):
+            conn = self._send_conn
+            if conn is None:
+                conn = self._open_send_connection()
+                self._send_conn = conn
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                text = response.read().decode("utf-8", errors="replace")
+                if response.will_close:
+                    conn.close()
+                    self._send_conn = None
+                return int(response.status), text
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; reconnect once.
+                conn.close()
+                self._send_conn = None
+                if attempt > 0:
+                    raise
+            except Exception:
+                conn.close()
+                self._send_conn = None
+                raise
+        raise RuntimeError("unreachable")
+
+    def _open_send_connection(self) -> http.client.HTTPSConnection:
+        # Honour HTTPS_PROXY/NO_PROXY like urlopen does for the other Bot API calls.
+        proxy = urllib.request.getproxies().get("https")
+        if not proxy or urllib.request.proxy_bypass(TELEGRAM_API_HOST):
+            return http.client.HTTPSConnection(TELEGRAM_API_HOST, timeout=self._request_timeout_sec)
+        parsed = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        conn = http.client.HTTPSConnection(
+            parsed.hostname or "", parsed.port or 80, timeout=self._request_timeout_sec
+        )
+        headers: Dict[str, str] = {}
+        if parsed.username:
+            credentials = (
+                f"{urllib.parse.unquote(parsed.username)}:"
+                f"{urllib.parse.unquote(parsed.password or '')}"
+            )
+            headers["Proxy-Authorization"] = "Basic " + base64.b64encode(
+                credentials.encode("utf-8")
+            ).decode("ascii")
+        conn.set_tunnel(TELEGRAM_API_HOST, 443, headers=headers)
+        return conn
+
     def _post_json(self, *, endpoint: str, payload: Dict[str, str | int]) -> dict[str, Any]:
         url = f"https://api.telegram.org/bot{self._bot_token}/{endpoint}"
         encoded = urllib.parse.urlencode(payload).encode("utf-8")
@@ -1491,9 +1678,9 @@ class TelegramClient:
     def _sanitize_text(self, text: str | None) -> str:
         if not text:
             return ""
-        if not self._bot_token:
-            return text
-        return text.replace(self._bot_token, self._masked_token)
+        if self._bot_token and self._bot_token in text:
+            return text.replace(self._bot_token, self._masked_token)
+        return text
 
     @staticmethod
     def _mask_secret(secret: str) -> str:
@@ -1506,6 +1693,8 @@ class TelegramClient:
 
 
 class TelegramNotifier:
+    _sleep: Callable[[float], Awaitable[None]] = staticmethod(asyncio.sleep)
+
     def __init__(
         self,
         *,
@@ -1537,6 +1726,7 @@ class TelegramNotifier:
         max_retries: int = 4,
         request_timeout_sec: float = 8.0,
         queue_maxsize: int = 256,
+        max_dedupe_entries: int = 4096,
         sender: Optional[Callable[[Dict[str, str | int]], TelegramSendResult]] = None,
         now_monotonic: Callable[[], float] = time.monotonic,
         sleep: Optional[Callable[[float], Awaitable[None]]] = None,
@@ -1551,6 +1741,7 @@ class TelegramNotifier:
         action_command_timeout_sec: float = 10.0,
         action_command_allowlist: Sequence[str] | None = None,
         action_command_max_lookback_days: int = 30,
+        action_ops_pool_size: int = 4,
         service_name: str = "hk-tick-collector",
     ) -> None:
         self._enabled = bool(enabled)
@@ -1563,9 +1754,17 @@ class TelegramNotifier:
         self._instance_id = instance_id.strip() if instance_id else None
         self._alert_cooldown_sec = max(30, int(alert_cooldown_sec))
         self._alert_escalation_steps = list(alert_escalation_steps or [0, 600, 1800])
+        self._alert_policies: Dict[NotifySeverity, tuple[int, tuple[int, ...]]] = {}
+        for item in NotifySeverity:
+            item_cooldown = self._severity_cooldown_sec(item)
+            self._alert_policies[item] = (
+                item_cooldown,
+                tuple(self._severity_escalation_steps(item, item_cooldown)),
+            )
         self._max_retries = max(1, int(max_retries))
         self._now_monotonic = now_monotonic
-        self._sleep = sleep or asyncio.sleep
+        if sleep is not None:
+            self._sleep = sleep
         callback_switch = enable_callbacks if interactive_enabled is None else interactive_enabled
         self._enable_callbacks = bool(callback_switch and sender is None)
         self._admin_user_ids: set[int] = {int(item) for item in (admin_user_ids or [])}
@@ -1608,15 +1807,13 @@ class TelegramNotifier:
             default_render_mode=self._default_render_mode,
         )
         self._state_machine = AlertStateMachine(drift_warn_sec=drift_warn_sec)
-        self._dedupe = DedupeStore()
+        self._dedupe = DedupeStore(max_entries=max_dedupe_entries)
         self._hostname = socket.gethostname()
         self._collector_version = _resolve_collector_version()
         self._muted_chats_until: Dict[str, float] = {}
         self._latest_health_context_id: str | None = None
 
-        self._queue: asyncio.Queue[_OutboundMessage | None] = asyncio.Queue(
-            maxsize=max(1, int(queue_maxsize))
-        )
+        self._queue = _OutboundQueue(maxsize=queue_maxsize)
         self._rate_limiter = SlidingWindowRateLimiter(
             limit_per_window=max(1, int(rate_limit_per_min)),
             window_sec=60.0,
@@ -1660,6 +1857,7 @@ class TelegramNotifier:
             command_rate_limit_per_min=action_command_rate_limit_per_min,
             command_allowlist=set(action_command_allowlist or []),
             command_max_lookback_days=action_command_max_lookback_days,
+            ops_pool_size=action_ops_pool_size,
             mute_chat_fn=self._mute_chat_for,
             is_muted_fn=self._is_chat_muted,
             get_latest_health_ctx_fn=self._get_latest_health_context,
@@ -1726,7 +1924,7 @@ class TelegramNotifier:
             return
         try:
             if self._worker_task is not None:
-                await self._queue.put(None)
+                self._queue.close()
                 await asyncio.wait_for(self._worker_task, timeout=15.0)
         except asyncio.TimeoutError:
             logger.error("telegram_notifier_stop_timeout")
@@ -1739,6 +1937,8 @@ class TelegramNotifier:
                 await asyncio.gather(self._callback_task, return_exceptions=True)
                 self._callback_task = None
             self._worker_task = None
+            self._action_router.close()
+            await asyncio.to_thread(self._client.close)
 
     def submit_health(self, snapshot: HealthSnapshot) -> None:
         if not self._active:
@@ -1866,8 +2066,7 @@ class TelegramNotifier:
         severity = _severity_from(event.severity)
         normalized = self._normalize_event_ids(event)
         fingerprint = normalized.fingerprint or normalized.key or normalized.code
-        cooldown_sec = self._severity_cooldown_sec(severity)
-        escalation_steps = self._severity_escalation_steps(severity, cooldown_sec)
+        cooldown_sec, escalation_steps = self._alert_policies[severity]
         should_send, reason = self._dedupe.evaluate(
             fingerprint=fingerprint,
             severity=severity,
@@ -1995,7 +2194,12 @@ class TelegramNotifier:
         message_id: int | None = None,
         action_context_id: str | None = None,
     ) -> bool:
-        clipped = truncate_rendered_message(message)
+        severity_value = severity.value
+        clipped = (
+            message
+            if len(message.text) <= TELEGRAM_MAX_MESSAGE_CHARS
+            else truncate_rendered_message(message)
+        )
         resolved_thread_id = (
             int(thread_id)
             if thread_id is not None
@@ -2014,32 +2218,44 @@ class TelegramNotifier:
             message_id=message_id,
             action_context_id=action_context_id,
         )
-        try:
-            self._queue.put_nowait(payload)
-            logger.info(
-                "telegram_enqueue kind=%s mode=%s severity=%s fingerprint=%s reason=%s thread_id=%s eid=%s sid=%s",
+        if self._queue.full():
+            dropped = self._queue.evict_lowest(_SEVERITY_RANK[severity])
+            if dropped is None:
+                logger.error(
+                    "telegram_queue_full kind=%s mode=%s severity=%s fingerprint=%s dropped=1 thread_id=%s eid=%s sid=%s",
+                    kind,
+                    mode,
+                    severity_value,
+                    fingerprint,
+                    resolved_thread_id if resolved_thread_id is not None else "none",
+                    eid or "none",
+                    sid or "none",
+                )
+                return False
+            logger.error(
+                "telegram_queue_full evicted=1 dropped_kind=%s dropped_severity=%s "
+                "dropped_fingerprint=%s kind=%s severity=%s fingerprint=%s",
+                dropped.kind,
+                dropped.severity.value,
+                dropped.fingerprint,
                 kind,
-                mode,
-                severity.value,
+                severity_value,
                 fingerprint,
-                reason,
-                resolved_thread_id if resolved_thread_id is not None else "none",
-                eid or "none",
-                sid or "none",
             )
-            return True
-        except asyncio.QueueFull:
-            logger.error(
-                "telegram_queue_full kind=%s mode=%s severity=%s fingerprint=%s dropped=1 thread_id=%s eid=%s sid=%s",
+        self._queue.put_nowait(payload)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "telegram_enqueue kind=%s mode=%s severity=%s fingerprint=%s reason=%s thread_id=%s eid=%s sid=%s",
                 kind,
                 mode,
-                severity.value,
+                severity_value,
                 fingerprint,
+                reason,
                 resolved_thread_id if resolved_thread_id is not None else "none",
                 eid or "none",
                 sid or "none",
             )
-            return False
+        return True
 
     def _should_emit_health(
         self,
@@ -2184,21 +2400,6 @@ class TelegramNotifier:
         state.db_path = str(snapshot.db_path)
 
     def _has_significant_digest_change(self, old: HealthSnapshot, new: HealthSnapshot) -> bool:
-        old_queue_pct = _queue_utilization_pct(old)
-        new_queue_pct = _queue_utilization_pct(new)
-        if abs(new_queue_pct - old_queue_pct) >= self._digest_queue_change_pct:
-            return True
-
-        old_age = _max_symbol_age_sec(old)
-        new_age = _max_symbol_age_sec(new)
-        if self._crossed_threshold(
-            before=old_age,
-            after=new_age,
-            threshold=self._digest_last_tick_age_threshold_sec,
-            use_abs=False,
-        ):
-            return True
-
         if (old.persisted_rows_per_min > 0) != (new.persisted_rows_per_min > 0):
             return True
 
@@ -2209,7 +2410,18 @@ class TelegramNotifier:
             use_abs=True,
         ):
             return True
-        return False
+
+        old_queue_pct = _queue_utilization_pct(old)
+        new_queue_pct = _queue_utilization_pct(new)
+        if abs(new_queue_pct - old_queue_pct) >= self._digest_queue_change_pct:
+            return True
+
+        return self._crossed_threshold(
+            before=old.max_symbol_age_sec,
+            after=new.max_symbol_age_sec,
+            threshold=self._digest_last_tick_age_threshold_sec,
+            use_abs=False,
+        )
 
     @staticmethod
     def _crossed_threshold(
@@ -2219,15 +2431,11 @@ class TelegramNotifier:
         threshold: float,
         use_abs: bool,
     ) -> bool:
-        if before is None and after is None:
+        if after is None:
             return False
-        if before is None or after is None:
-            value = abs(after) if (after is not None and use_abs) else after
-            return bool(value is not None and value >= threshold)
-
-        lhs = abs(before) if use_abs else before
+        lhs = -math.inf if before is None else (abs(before) if use_abs else before)
         rhs = abs(after) if use_abs else after
-        return (lhs < threshold <= rhs) or (lhs >= threshold > rhs)
+        return (lhs >= threshold) is not (rhs >= threshold)
 
     def _select_thread_id(self, *, kind: str, severity: NotifySeverity) -> int | None:
         if kind in {"HEALTH", "DAILY_DIGEST"}:
@@ -2517,13 +2725,23 @@ class TelegramNotifier:
             try:
                 if payload is None:
                     return
-                await self._deliver(payload)
+                if self._queue.has_newer(payload):
+                    logger.info(
+                        "telegram_coalesced kind=%s mode=%s fingerprint=%s superseded_sid=%s",
+                        payload.kind,
+                        payload.mode,
+                        payload.fingerprint,
+                        payload.sid or "none",
+                    )
+                else:
+                    await self._deliver(payload)
             except Exception:
                 logger.exception("telegram_delivery_unhandled_error")
             finally:
                 self._queue.task_done()
 
     async def _deliver(self, payload: _OutboundMessage) -> None:
+        severity_value = payload.severity.value
         for attempt in range(1, self._max_retries + 1):
             await self._wait_for_rate_limit_slot()
             if payload.mode == "edit" and payload.message_id is not None:
@@ -2555,16 +2773,17 @@ class TelegramNotifier:
                         chat_id=payload.chat_id or self._chat_id,
                         message_id=result.message_id,
                     )
-                logger.info(
-                    "telegram_send_ok kind=%s mode=%s severity=%s fingerprint=%s attempt=%s eid=%s sid=%s",
-                    payload.kind,
-                    payload.mode,
-                    payload.severity.value,
-                    payload.fingerprint,
-                    attempt,
-                    payload.eid or "none",
-                    payload.sid or "none",
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "telegram_send_ok kind=%s mode=%s severity=%s fingerprint=%s attempt=%s eid=%s sid=%s",
+                        payload.kind,
+                        payload.mode,
+                        severity_value,
+                        payload.fingerprint,
+                        attempt,
+                        payload.eid or "none",
+                        payload.sid or "none",
+                    )
                 return
 
             if (
@@ -2575,7 +2794,7 @@ class TelegramNotifier:
                 logger.warning(
                     "telegram_rate_limited kind=%s severity=%s fingerprint=%s retry_after=%s attempt=%s eid=%s sid=%s",
                     payload.kind,
-                    payload.severity.value,
+                    severity_value,
                     payload.fingerprint,
                     result.retry_after,
                     attempt,
@@ -2589,7 +2808,7 @@ class TelegramNotifier:
                 logger.error(
                     "telegram_send_failed kind=%s severity=%s fingerprint=%s status=%s err=%s attempts=%s eid=%s sid=%s",
                     payload.kind,
-                    payload.severity.value,
+                    severity_value,
                     payload.fingerprint,
                     result.status_code,
                     result.error or "unknown",
@@ -2599,11 +2818,9 @@ class TelegramNotifier:
                 )
                 return
 
-            await self._sleep(min(8.0, float(2 ** (attempt - 1))))
+            await self._sleep(_BACKOFF_SCHEDULE[min(attempt, len(_BACKOFF_SCHEDULE)) - 1])
 
     async def _wait_for_rate_limit_slot(self) -> None:
-        while True:
-            delay = self._rate_limiter.reserve_delay()
-            if delay <= 0:
-                return
+        delay = self._rate_limiter.reserve_delay()
+        if delay > 0:
             await self._sleep(delay)
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import re
 import shlex
 import subprocess
+import threading
 import time
-from collections import Counter, deque
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
-from html import escape
-from typing import Any, Callable, Sequence
+from datetime import date
+from functools import lru_cache, partial
+from typing import Any, Callable, Iterator, Sequence, TypeVar
 
 from .telegram_render import (
+    TELEGRAM_MAX_MESSAGE_CHARS,
     RenderOutput,
+    callback_data_fits,
+    escape_truncated_text,
     render_db_status_from_snapshot,
     render_logs_summary,
     render_sop,
@@ -20,14 +26,64 @@ from .telegram_render import (
     truncate_text,
 )
 
-_CALLBACK_MAX_BYTES = 64
-_DAY_RE = re.compile(r"^\d{8}$")
+_T = TypeVar("_T")
+
+_CALLBACK_ACTIONS = frozenset({"d", "log", "db", "sop", "mute", "rf", "top"})
 _SYMBOL_RE = re.compile(r"^[A-Za-z0-9._-]{2,24}$")
-_DEFAULT_COMMAND_ALLOWLIST = {"help", "db_stats", "top_symbols", "symbol"}
-_TOP_METRICS = {"rows", "turnover", "volume"}
+_SYMBOL_MATCH = _SYMBOL_RE.match
+_DEFAULT_COMMAND_ALLOWLIST = frozenset({"help", "db_stats", "top_symbols", "symbol"})
+_COMMAND_ALIASES = {"start": "help"}
+_DB_STATS_OPTS = frozenset({"day"})
+_TOP_SYMBOLS_OPTS = frozenset({"limit", "minutes", "metric", "day"})
+_SYMBOL_OPTS = frozenset({"last", "day"})
+_TOP_METRICS = frozenset({"rows", "turnover", "volume"})
+_REFRESH_TRACK_MAX_CHATS = 1024
+_AUTH_CACHE_MAX_ENTRIES = 64
+_RATE_LIMIT_SWEEP_EVERY = 1024
+_LOG_FILTER_KEYWORDS = ("error", "warn", "watchdog", "persist", "sqlite_busy", "alert_event")
+_RATE_LIMITED_TEXT = "<b>⏱ 查詢過於頻繁</b>\n結論：已觸發每分鐘頻率限制\n下一步：請稍後約 1 分鐘再試"
+_UNKNOWN_OPERATOR_TEXT = "無法辨識操作者"
+_COMMAND_NOT_ALLOWED_TEXT = (
+    "<b>⛔ 指令未啟用</b>\n結論：該命令目前不在允許清單\n下一步：請用 /help 查看已啟用命令"
+)
+_UNKNOWN_COMMAND_TEXT = "<b>❔ 未知指令</b>\n結論：目前不支援該命令\n下一步：請用 /help 查看可用命令"
+_COMMAND_TIMEOUT_TEXT = (
+    "<b>⚠️ 操作逾時</b>\n結論：查詢超過逾時門檻\n下一步：縮小範圍（如 minutes/last）或稍後再試"
+)
+_COMMAND_FAILED_TEXT = "<b>⚠️ 操作失敗</b>\n結論：指令執行失敗\n下一步：請稍後再試或查看服務日誌"
+_DAY_FORMAT_ERROR_TEXT = (
+    "<b>❌ 參數錯誤</b>\n結論：日期需為 YYYYMMDD（亦可用 YYYY-MM-DD）\n下一步：例 --day 20260220"
+)
+_FUTURE_DAY_ERROR_TEMPLATE = (
+    "<b>❌ 日期超出範圍</b>\n"
+    "結論：不可查詢未來日期（today={today}）\n"
+    "下一步：請改查今天或更早的交易日"
+)
+_LOOKBACK_ERROR_TEMPLATE = (
+    "<b>❌ 日期超出範圍</b>\n"
+    "結論：最多只允許回看 {lookback_days} 天\n"
+    "下一步：請改查 {today} 往前 {lookback_days} 天內資料"
+)
+_MUTED_TEMPLATE = (
+    "<b>🔕 靜音已啟用</b>\n"
+    "結論：此 chat 將靜音 {minutes} 分鐘的 HEALTH/WARN 心跳\n"
+    "關鍵指標：ALERT 類通知仍會送出\n"
+    "下一步：若要即時查看現況可按「🔄 刷新」"
+)
+_SYMBOL_MISSING_TEXT = "<b>❌ 參數錯誤</b>\n結論：缺少 symbol\n下一步：例 /symbol HK.00700 20"
+_HELP_TEXT_TEMPLATE = (
+    "<b>🤖 可用指令</b>\n"
+    "1) /db_stats [YYYYMMDD] 或 /db_stats --day YYYYMMDD\n"
+    "2) /top_symbols [limit] [minutes] [rows|turnover|volume] [YYYYMMDD]\n"
+    "   也可用 --limit/--minutes/--metric/--day\n"
+    "3) /symbol &lt;SYMBOL&gt; [last] [YYYYMMDD]（支援 --last/--day）\n"
+    "4) 日期查詢最遠可回看 {lookback_days} 天\n"
+    "下一步：例 /top_symbols --limit 10 --minutes 15 --metric rows --day 20260220"
+)
+_REDACT_RE = re.compile(r"(\b\d{8,}:[A-Za-z0-9_-]{20,}\b)|(?i:token)\s*[=:]\s*\S+")
 
 
-@dataclass
+@dataclass(slots=True)
 class ActionContext:
     context_id: str
     kind: str
@@ -49,13 +105,13 @@ class ActionContext:
     message_id: int | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CallbackRoute:
     action: str
     value: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RouterMessage:
     mode: str
     text: str
@@ -68,17 +124,54 @@ class RouterMessage:
     message_id: int | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CallbackDispatchResult:
     ack_text: str | None
     messages: list[RouterMessage]
 
 
+# Shared results; their message lists must not be mutated.
+_UNKNOWN_ACTION_RESULT = CallbackDispatchResult(ack_text="未知操作", messages=[])
+_CONTEXT_EXPIRED_RESULT = CallbackDispatchResult(ack_text="上下文已過期", messages=[])
+_REFRESH_THROTTLED_RESULT = CallbackDispatchResult(ack_text="刷新太頻繁", messages=[])
+_NOTHING_TO_REFRESH_RESULT = CallbackDispatchResult(ack_text="目前沒有可刷新資料", messages=[])
+_CALLBACK_TIMEOUT_RESULT = CallbackDispatchResult(
+    ack_text="操作逾時",
+    messages=[
+        RouterMessage(mode="send", text="<b>⚠️ 操作逾時</b>\n結論：查詢超時\n下一步：請稍後再試")
+    ],
+)
+_CALLBACK_FAILED_RESULT = CallbackDispatchResult(
+    ack_text="操作失敗",
+    messages=[
+        RouterMessage(
+            mode="send",
+            text="<b>⚠️ 操作失敗</b>\n結論：互動查詢執行失敗\n下一步：請稍後再試或查看服務日誌",
+        )
+    ],
+)
+
+
+def _is_trading_day(value: str | None) -> bool:
+    return bool(value) and len(value) == 8 and value.isascii() and value.isdigit()
+
+
+@lru_cache(maxsize=256)
+def _parse_yyyymmdd(value: str) -> date:
+    return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+
+def _redact_match(match: re.Match[str]) -> str:
+    return "[REDACTED_TOKEN]" if match.group(1) else "token=[REDACTED]"
+
+
 class ActionContextStore:
-    def __init__(self, ttl_sec: int = 43200) -> None:
+    def __init__(self, ttl_sec: int = 43200, *, max_entries: int = 10000) -> None:
         self._ttl_sec = max(3600, int(ttl_sec))
+        self._max_entries = max(1, int(max_entries))
         self._contexts: dict[str, ActionContext] = {}
         self._message_index: dict[tuple[str, int], str] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
 
     def put(
         self,
@@ -97,13 +190,16 @@ class ActionContextStore:
         event: Any | None = None,
         digest: Any | None = None,
     ) -> None:
-        self._cleanup()
         now = time.time()
-        self._contexts[context_id] = ActionContext(
+        self._cleanup(now)
+        expires_at = now + self._ttl_sec
+        heapq.heappush(self._expiry_heap, (expires_at, context_id))
+        previous = self._contexts.get(context_id)
+        self._contexts[context_id] = ctx = ActionContext(
             context_id=context_id,
             kind=kind,
             created_at=now,
-            expires_at=now + self._ttl_sec,
+            expires_at=expires_at,
             compact_text=compact_text,
             detail_text=detail_text,
             parse_mode=parse_mode,
@@ -116,45 +212,62 @@ class ActionContextStore:
             event=event,
             digest=digest,
         )
+        if previous is not None:
+            # Keep a re-put context's message binding so its index entry is evicted with it.
+            ctx.chat_id = previous.chat_id
+            ctx.message_id = previous.message_id
+        heap = self._expiry_heap
+        while len(self._contexts) > self._max_entries and heap:
+            # Every context shares one TTL, so the heap root is also the oldest context.
+            self._evict(*heapq.heappop(heap))
 
     def bind_message(self, *, context_id: str, chat_id: str, message_id: int) -> None:
-        self._cleanup()
-        ctx = self._contexts.get(context_id)
+        ctx = self.get(context_id)
         if ctx is None:
             return
+        if ctx.chat_id is not None and ctx.message_id is not None:
+            self._message_index.pop((ctx.chat_id, ctx.message_id), None)
         ctx.chat_id = chat_id
         ctx.message_id = int(message_id)
-        self._message_index[(chat_id, int(message_id))] = context_id
+        self._message_index[(chat_id, ctx.message_id)] = context_id
 
     def get(self, context_id: str) -> ActionContext | None:
-        self._cleanup()
-        return self._contexts.get(context_id)
+        ctx = self._contexts.get(context_id)
+        if ctx is None or ctx.expires_at <= time.time():
+            return None
+        return ctx
 
     def get_by_message(self, *, chat_id: str, message_id: int) -> ActionContext | None:
-        self._cleanup()
-        context_id = self._message_index.get((chat_id, int(message_id)))
+        if type(message_id) is not int:
+            message_id = int(message_id)
+        context_id = self._message_index.get((chat_id, message_id))
         if not context_id:
             return None
-        return self._contexts.get(context_id)
+        return self.get(context_id)
 
     def set_detail_expanded(self, *, context_id: str, expanded: bool) -> None:
-        self._cleanup()
-        ctx = self._contexts.get(context_id)
+        ctx = self.get(context_id)
         if ctx is None:
             return
         ctx.detail_expanded = bool(expanded)
 
     def count(self) -> int:
-        self._cleanup()
+        self._cleanup(time.time())
         return len(self._contexts)
 
-    def _cleanup(self) -> None:
-        now = time.time()
-        stale = [key for key, value in self._contexts.items() if value.expires_at <= now]
-        for key in stale:
-            ctx = self._contexts.pop(key, None)
-            if ctx and ctx.chat_id is not None and ctx.message_id is not None:
-                self._message_index.pop((ctx.chat_id, ctx.message_id), None)
+    def _cleanup(self, now: float) -> None:
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            self._evict(*heapq.heappop(heap))
+
+    def _evict(self, expires_at: float, context_id: str) -> None:
+        ctx = self._contexts.get(context_id)
+        # A re-put context has a newer heap entry; skip the superseded one.
+        if ctx is None or ctx.expires_at != expires_at:
+            return
+        del self._contexts[context_id]
+        if ctx.chat_id is not None and ctx.message_id is not None:
+            self._message_index.pop((ctx.chat_id, ctx.message_id), None)
 
 
 class SafeOpsCommandRunner:
@@ -174,7 +287,7 @@ class SafeOpsCommandRunner:
         else:
             self._command_timeout_sec = max(self._timeout_sec, float(command_timeout_sec))
 
-    def collect_recent_logs(self) -> list[str]:
+    def collect_recent_logs(self, *, max_lines: int | None = None) -> list[str]:
         cmd = [
             "journalctl",
             "-u",
@@ -183,14 +296,24 @@ class SafeOpsCommandRunner:
             f"{self._log_window_minutes} minutes ago",
             "--no-pager",
         ]
-        output = self._run_allowed(cmd=cmd)
-        lines = output.splitlines()
-        pattern = re.compile(r"(ERROR|WARN|WATCHDOG|persist|sqlite_busy|alert_event)", re.IGNORECASE)
-        selected = [line.strip() for line in lines if pattern.search(line)]
-        return [self._sanitize(line) for line in selected if line.strip()]
+        sanitize = self._sanitize
+        selected: list[str] = []
+        for line in self._stream_allowed(cmd=cmd):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            # Plain substring checks on the lowered line beat a regex alternation of literals.
+            lowered = stripped.lower()
+            for keyword in _LOG_FILTER_KEYWORDS:
+                if keyword in lowered:
+                    selected.append(sanitize(stripped))
+                    break
+            if max_lines is not None and len(selected) >= max_lines:
+                break
+        return selected
 
     def collect_db_stats(self, *, trading_day: str | None) -> str:
-        if trading_day and trading_day.isdigit() and len(trading_day) == 8:
+        if _is_trading_day(trading_day):
             cmd = ["scripts/hk-tickctl", "db", "stats", "--day", trading_day]
         else:
             cmd = ["scripts/hk-tickctl", "db", "stats"]
@@ -220,7 +343,7 @@ class SafeOpsCommandRunner:
             "--metric",
             safe_metric,
         ]
-        if trading_day and _DAY_RE.match(trading_day):
+        if _is_trading_day(trading_day):
             cmd.extend(["--day", trading_day])
         return self._sanitize(self._run_allowed(cmd=cmd, timeout_sec=self._command_timeout_sec))
 
@@ -232,7 +355,7 @@ class SafeOpsCommandRunner:
         last: int,
     ) -> str:
         safe_symbol = symbol.strip().upper()
-        if not _SYMBOL_RE.match(safe_symbol):
+        if not _SYMBOL_MATCH(safe_symbol):
             raise ValueError("symbol_not_allowed")
         safe_last = max(1, min(100, int(last)))
         cmd = [
@@ -243,22 +366,66 @@ class SafeOpsCommandRunner:
             "--last",
             str(safe_last),
         ]
-        if trading_day and _DAY_RE.match(trading_day):
+        if _is_trading_day(trading_day):
             cmd.extend(["--day", trading_day])
         return self._sanitize(self._run_allowed(cmd=cmd, timeout_sec=self._command_timeout_sec))
 
-    def _run_allowed(self, *, cmd: list[str], timeout_sec: float | None = None) -> str:
+    def _check_allowed(self, cmd: list[str]) -> None:
         allowed_prefixes = {
             ("journalctl", "-u"),
             ("scripts/hk-tickctl", "db"),
         }
         if tuple(cmd[:2]) not in allowed_prefixes:
             raise ValueError("command_not_allowed")
-        effective_timeout = self._timeout_sec if timeout_sec is None else max(1.0, float(timeout_sec))
+
+    def _effective_timeout(self, timeout_sec: float | None) -> float:
+        return self._timeout_sec if timeout_sec is None else max(1.0, float(timeout_sec))
+
+    def _stream_allowed(self, *, cmd: list[str], timeout_sec: float | None = None) -> Iterator[str]:
+        # Yields stdout/stderr lines as they arrive so large journals are never buffered whole.
+        self._check_allowed(cmd)
+        effective_timeout = self._effective_timeout(timeout_sec)
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            encoding="utf-8",
+            errors="replace",
+        )
+        expired = threading.Event()
+
+        def _expire() -> None:
+            expired.set()
+            proc.kill()
+
+        timer = threading.Timer(effective_timeout, _expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            assert proc.stdout is not None
+            yield from proc.stdout
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            if proc.stdout is not None:
+                proc.stdout.close()
+            proc.wait()
+        if expired.is_set():
+            raise subprocess.TimeoutExpired(cmd, effective_timeout)
+
+    def _run_allowed(self, *, cmd: list[str], timeout_sec: float | None = None) -> str:
+        self._check_allowed(cmd)
+        effective_timeout = self._effective_timeout(timeout_sec)
+        # close_fds stays on: CPython already spawns through vfork here, and ops commands must
+        # not inherit the collector's SQLite and socket descriptors.
         completed = subprocess.run(
             cmd,
+            stdin=subprocess.DEVNULL,
             capture_output=True,
-            text=True,
+            encoding="utf-8",
+            errors="replace",
             timeout=effective_timeout,
             check=False,
         )
@@ -268,9 +435,41 @@ class SafeOpsCommandRunner:
     def _sanitize(self, text: str) -> str:
         if not text:
             return ""
-        masked = re.sub(r"\b\d{8,}:[A-Za-z0-9_-]{20,}\b", "[REDACTED_TOKEN]", text)
-        masked = re.sub(r"(?i)token\s*[=:]\s*\S+", "token=[REDACTED]", masked)
-        return masked
+        return _REDACT_RE.sub(_redact_match, text)
+
+
+@lru_cache(maxsize=256)
+def _parse_callback_data_cached(text: str) -> CallbackRoute | None:
+    if not text:
+        return None
+    if not callback_data_fits(text):
+        return None
+    if ":" not in text:
+        return None
+    action, value = text.split(":", 1)
+    normalized = action.strip().lower()
+    if normalized not in _CALLBACK_ACTIONS:
+        return None
+    return CallbackRoute(action=normalized, value=value.strip())
+
+
+@lru_cache(maxsize=512)
+def _parse_text_command_cached(raw: str) -> tuple[str, tuple[str, ...]] | None:
+    if not raw.startswith("/"):
+        return None
+    if raw.isascii() and '"' not in raw and "'" not in raw and "\\" not in raw:
+        # Nothing for shlex to unquote; str.split yields the same tokens.
+        tokens = raw.split()
+    else:
+        try:
+            tokens = shlex.split(raw)
+        except ValueError:
+            tokens = raw.split()
+    if not tokens:
+        return None
+    command_token = tokens[0]
+    command_name = command_token[1:].split("@", 1)[0].strip().lower()
+    return command_name, tuple(tokens[1:])
 
 
 class TelegramActionRouter:
@@ -295,24 +494,29 @@ class TelegramActionRouter:
         get_daily_top_anomalies_fn: Callable[[str], list[tuple[str, int]]],
         command_allowlist: set[str] | None = None,
         command_max_lookback_days: int = 30,
+        ops_pool_size: int = 4,
     ) -> None:
         self._store = context_store
         self._ops_runner = ops_runner
         self._allowed_chat_id = allowed_chat_id.strip()
-        self._admin_user_ids = set(admin_user_ids)
+        self._admin_user_ids: frozenset[int] = frozenset(int(item) for item in admin_user_ids)
+        self._auth_cache: dict[tuple[str, int | None], tuple[bool, str]] = {}
         self._log_max_lines = max(1, int(log_max_lines))
         self._refresh_min_interval_sec = max(5, int(refresh_min_interval_sec))
         self._command_rate_limit_per_min = max(1, int(command_rate_limit_per_min))
-        raw_allowlist = set(command_allowlist or _DEFAULT_COMMAND_ALLOWLIST)
-        self._command_allowlist = {
-            self._canonical_command(item.strip().lower())
-            for item in raw_allowlist
-            if item and item.strip()
-        }
-        if not self._command_allowlist:
-            self._command_allowlist = set(_DEFAULT_COMMAND_ALLOWLIST)
+        self._command_allowlist: frozenset[str] = _DEFAULT_COMMAND_ALLOWLIST
+        if command_allowlist:
+            self._command_allowlist = (
+                frozenset(
+                    self._canonical_command(item)
+                    for item in command_allowlist
+                    if item and item.strip()
+                )
+                or _DEFAULT_COMMAND_ALLOWLIST
+            )
         self._command_max_lookback_days = max(0, int(command_max_lookback_days))
         self._command_hits: dict[int, deque[float]] = {}
+        self._command_checks = 0
         self._mute_chat_fn = mute_chat_fn
         self._is_muted_fn = is_muted_fn
         self._get_latest_health_ctx_fn = get_latest_health_ctx_fn
@@ -322,35 +526,62 @@ class TelegramActionRouter:
         self._render_alert_detail_fn = render_alert_detail_fn
         self._market_mode_of_event_fn = market_mode_of_event_fn
         self._get_daily_top_anomalies_fn = get_daily_top_anomalies_fn
-        self._last_refresh_at: dict[str, float] = {}
+        self._last_refresh_at: OrderedDict[str, float] = OrderedDict()
+        self._ops_pool_size = max(1, int(ops_pool_size))
+        # Created on first use and dropped by close(), so a closed router can be reused.
+        self._ops_executor: ThreadPoolExecutor | None = None
+        # Callback handlers take (chat_id, message_id, value); some return a coroutine.
+        self._callback_handlers: dict[str, Callable[[str, int | None, str], Any]] = {
+            "d": lambda chat_id, message_id, value: self._on_toggle_detail(
+                chat_id=chat_id, message_id=message_id, context_id=value
+            ),
+            "log": lambda _chat_id, _message_id, value: self._on_logs(context_id=value),
+            "db": lambda _chat_id, _message_id, value: self._on_db(context_id=value),
+            "sop": lambda _chat_id, _message_id, value: self._on_sop(value=value),
+            "mute": lambda chat_id, _message_id, value: self._on_mute(chat_id=chat_id, value=value),
+            "rf": lambda chat_id, message_id, value: self._on_refresh(
+                chat_id=chat_id, message_id=message_id, context_id=value
+            ),
+            "top": lambda _chat_id, _message_id, value: self._on_top(context_id=value),
+        }
+        self._command_handlers = {
+            "db_stats": self._on_command_db_stats,
+            "top_symbols": self._on_command_top_symbols,
+            "symbol": self._on_command_symbol,
+        }
+        self._rate_limited_result = self._render_command_result(_RATE_LIMITED_TEXT)
+        self._unknown_operator_result = self._render_command_result(_UNKNOWN_OPERATOR_TEXT)
+        self._not_allowed_result = self._render_command_result(_COMMAND_NOT_ALLOWED_TEXT)
+        self._unknown_command_result = self._render_command_result(_UNKNOWN_COMMAND_TEXT)
+        self._command_timeout_result = self._render_command_result(_COMMAND_TIMEOUT_TEXT)
+        self._command_failed_result = self._render_command_result(_COMMAND_FAILED_TEXT)
+        self._help_result = self._render_command_result(
+            _HELP_TEXT_TEMPLATE.format(lookback_days=self._command_max_lookback_days)
+        )
+
+    def close(self) -> None:
+        executor, self._ops_executor = self._ops_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_ops(self, fn: Callable[..., _T], /, **kwargs: Any) -> _T:
+        executor = self._ops_executor
+        if executor is None:
+            executor = self._ops_executor = ThreadPoolExecutor(
+                max_workers=self._ops_pool_size, thread_name_prefix="tg-ops"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(fn, **kwargs))
 
     def parse_callback_data(self, data: str) -> CallbackRoute | None:
-        text = data.strip()
-        if not text:
-            return None
-        if len(text.encode("utf-8")) > _CALLBACK_MAX_BYTES:
-            return None
-        if ":" not in text:
-            return None
-        action, value = text.split(":", 1)
-        normalized = action.strip().lower()
-        if normalized not in {"d", "log", "db", "sop", "mute", "rf", "top"}:
-            return None
-        return CallbackRoute(action=normalized, value=value.strip())
+        return _parse_callback_data_cached(data.strip())
 
     def parse_text_command(self, text: str) -> tuple[str, list[str]] | None:
-        raw = text.strip()
-        if not raw.startswith("/"):
-            return None
-        try:
-            tokens = shlex.split(raw)
-        except ValueError:
-            tokens = raw.split()
-        if not tokens:
+        parsed = _parse_text_command_cached(text.strip())
+        if parsed is None:
             return None
-        command_token = tokens[0]
-        command_name = command_token[1:].split("@", 1)[0].strip().lower()
-        return command_name, tokens[1:]
+        command_name, args = parsed
+        return command_name, list(args)
 
     async def handle_text_command(
         self,
@@ -371,56 +602,25 @@ class TelegramActionRouter:
                 messages=[RouterMessage(mode="send", kind="COMMAND", text=deny_text)],
             )
         if user_id is None:
-            return CallbackDispatchResult(
-                ack_text=None,
-                messages=[RouterMessage(mode="send", kind="COMMAND", text="無法辨識操作者")],
-            )
+            return self._unknown_operator_result
         if not self._within_command_rate_limit(user_id):
-            return CallbackDispatchResult(
-                ack_text=None,
-                messages=[
-                    RouterMessage(
-                        mode="send",
-                        kind="COMMAND",
-                        text=(
-                            "<b>⏱ 查詢過於頻繁</b>\n"
-                            "結論：已觸發每分鐘頻率限制\n"
-                            "下一步：請稍後約 1 分鐘再試"
-                        ),
-                    )
-                ],
-            )
+            return self._rate_limited_result
 
         command, args = parsed
         command = self._canonical_command(command)
         if command not in self._command_allowlist:
-            return self._render_command_result(
-                "<b>⛔ 指令未啟用</b>\n"
-                "結論：該命令目前不在允許清單\n"
-                "下一步：請用 /help 查看已啟用命令"
-            )
+            return self._not_allowed_result
+        if command == "help":
+            return self._help_result
+        handler = self._command_handlers.get(command)
+        if handler is None:
+            return self._unknown_command_result
         try:
-            if command == "help":
-                return self._render_command_result(self._render_help_text())
-            if command == "db_stats":
-                return await self._on_command_db_stats(args=args, trading_day=trading_day)
-            if command == "top_symbols":
-                return await self._on_command_top_symbols(args=args, trading_day=trading_day)
-            if command == "symbol":
-                return await self._on_command_symbol(args=args, trading_day=trading_day)
-            return self._render_command_result(
-                "<b>❔ 未知指令</b>\n結論：目前不支援該命令\n下一步：請用 /help 查看可用命令"
-            )
+            return await handler(args=args, trading_day=trading_day)
         except subprocess.TimeoutExpired:
-            return self._render_command_result(
-                "<b>⚠️ 操作逾時</b>\n"
-                "結論：查詢超過逾時門檻\n"
-                "下一步：縮小範圍（如 minutes/last）或稍後再試"
-            )
+            return self._command_timeout_result
         except Exception:
-            return self._render_command_result(
-                "<b>⚠️ 操作失敗</b>\n結論：指令執行失敗\n下一步：請稍後再試或查看服務日誌"
-            )
+            return self._command_failed_result
 
     async def handle_callback_query(
         self,
@@ -432,49 +632,21 @@ class TelegramActionRouter:
     ) -> CallbackDispatchResult:
         route = self.parse_callback_data(data)
         if route is None:
-            return CallbackDispatchResult(ack_text="未知操作", messages=[])
+            return _UNKNOWN_ACTION_RESULT
 
         authorized, deny_text = self._authorize(chat_id=chat_id, user_id=user_id)
         if not authorized:
             return CallbackDispatchResult(ack_text=deny_text, messages=[])
 
         try:
-            if route.action == "d":
-                return self._on_toggle_detail(chat_id=chat_id, message_id=message_id, context_id=route.value)
-            if route.action == "log":
-                return await self._on_logs(context_id=route.value)
-            if route.action == "db":
-                return await self._on_db(context_id=route.value)
-            if route.action == "sop":
-                return self._on_sop(value=route.value)
-            if route.action == "mute":
-                return self._on_mute(chat_id=chat_id, value=route.value)
-            if route.action == "rf":
-                return self._on_refresh(chat_id=chat_id, message_id=message_id, context_id=route.value)
-            if route.action == "top":
-                return self._on_top(context_id=route.value)
+            result = self._callback_handlers[route.action](chat_id, message_id, route.value)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
         except subprocess.TimeoutExpired:
-            return CallbackDispatchResult(
-                ack_text="操作逾時",
-                messages=[
-                    RouterMessage(
-                        mode="send",
-                        text="<b>⚠️ 操作逾時</b>\n結論：查詢超時\n下一步：請稍後再試",
-                    )
-                ],
-            )
+            return _CALLBACK_TIMEOUT_RESULT
         except Exception:
-            return CallbackDispatchResult(
-                ack_text="操作失敗",
-                messages=[
-                    RouterMessage(
-                        mode="send",
-                        text="<b>⚠️ 操作失敗</b>\n結論：互動查詢執行失敗\n下一步：請稍後再試或查看服務日誌",
-                    )
-                ],
-            )
-
-        return CallbackDispatchResult(ack_text=None, messages=[])
+            return _CALLBACK_FAILED_RESULT
 
     def _on_toggle_detail(
         self,
@@ -487,7 +659,7 @@ class TelegramActionRouter:
         if ctx is None and message_id is not None:
             ctx = self._store.get_by_message(chat_id=chat_id, message_id=message_id)
         if ctx is None:
-            return CallbackDispatchResult(ack_text="上下文已過期", messages=[])
+            return _CONTEXT_EXPIRED_RESULT
 
         next_expanded = not ctx.detail_expanded
         self._store.set_detail_expanded(context_id=ctx.context_id, expanded=next_expanded)
@@ -514,7 +686,11 @@ class TelegramActionRouter:
         )
 
     async def _on_logs(self, *, context_id: str) -> CallbackDispatchResult:
-        lines = await asyncio.to_thread(self._ops_runner.collect_recent_logs)
+        # One extra line lets the summary report truncation without scanning the rest.
+        lines = await self._run_ops(
+            self._ops_runner.collect_recent_logs,
+            max_lines=self._log_max_lines + 1,
+        )
         clipped = lines[: self._log_max_lines]
         text = render_logs_summary(lines=clipped, truncated=len(lines) > len(clipped))
         text, _ = truncate_text(text)
@@ -527,7 +703,7 @@ class TelegramActionRouter:
         ctx = self._store.get(context_id)
         trading_day = ctx.trading_day if ctx is not None else None
         try:
-            output = await asyncio.to_thread(
+            output = await self._run_ops(
                 self._ops_runner.collect_db_stats,
                 trading_day=trading_day,
             )
@@ -556,15 +732,11 @@ class TelegramActionRouter:
         if value.isdigit():
             seconds = max(60, min(86400, int(value)))
         self._mute_chat_fn(chat_id, seconds)
-        text = (
-            "<b>🔕 靜音已啟用</b>\n"
-            f"結論：此 chat 將靜音 {seconds // 60} 分鐘的 HEALTH/WARN 心跳\n"
-            "關鍵指標：ALERT 類通知仍會送出\n"
-            "下一步：若要即時查看現況可按「🔄 刷新」"
-        )
         return CallbackDispatchResult(
             ack_text="已靜音",
-            messages=[RouterMessage(mode="send", text=text)],
+            messages=[
+                RouterMessage(mode="send", text=_MUTED_TEMPLATE.format(minutes=seconds // 60))
+            ],
         )
 
     def _on_refresh(
@@ -577,12 +749,19 @@ class TelegramActionRouter:
         now = time.monotonic()
         last = self._last_refresh_at.get(chat_id, 0.0)
         if (now - last) < self._refresh_min_interval_sec:
-            return CallbackDispatchResult(ack_text="刷新太頻繁", messages=[])
-        self._last_refresh_at[chat_id] = now
+            return _REFRESH_THROTTLED_RESULT
+        refreshed = self._last_refresh_at
+        refreshed[chat_id] = now
+        refreshed.move_to_end(chat_id)
+        # Entries stay in refresh order, so chats that can no longer be throttled sit up front.
+        while len(refreshed) > _REFRESH_TRACK_MAX_CHATS or (
+            now - next(iter(refreshed.values())) >= self._refresh_min_interval_sec
+        ):
+            refreshed.popitem(last=False)
 
         current = self._get_latest_health_ctx_fn()
         if current is None or current.snapshot is None or current.assessment is None:
-            return CallbackDispatchResult(ack_text="目前沒有可刷新資料", messages=[])
+            return _NOTHING_TO_REFRESH_RESULT
 
         compact = self._render_health_compact_fn(current.snapshot, current.assessment)
         detail = self._render_health_detail_fn(current.snapshot, current.assessment, True)
@@ -639,7 +818,7 @@ class TelegramActionRouter:
         trading_day: str | None,
     ) -> CallbackDispatchResult:
         try:
-            positional, options = self._split_option_args(args=args, allowed={"day"})
+            positional, options = self._split_option_args(args=args, allowed=_DB_STATS_OPTS)
         except ValueError:
             return self._render_command_result(
                 "<b>❌ 參數錯誤</b>\n"
@@ -658,7 +837,7 @@ class TelegramActionRouter:
         )
         if day_error:
             return self._render_command_result(day_error)
-        output = await asyncio.to_thread(
+        output = await self._run_ops(
             self._ops_runner.collect_db_stats,
             trading_day=day_override,
         )
@@ -673,9 +852,7 @@ class TelegramActionRouter:
         trading_day: str | None,
     ) -> CallbackDispatchResult:
         try:
-            positional, options = self._split_option_args(
-                args=args, allowed={"limit", "minutes", "metric", "day"}
-            )
+            positional, options = self._split_option_args(args=args, allowed=_TOP_SYMBOLS_OPTS)
         except ValueError:
             return self._render_command_result(
                 "<b>❌ 參數錯誤</b>\n"
@@ -689,10 +866,12 @@ class TelegramActionRouter:
                 "下一步：例 /top_symbols 10 15 rows 20260220"
             )
 
-        limit_text = options.get("limit") or (positional[0] if len(positional) >= 1 else "")
-        minutes_text = options.get("minutes") or (positional[1] if len(positional) >= 2 else "")
-        metric = (options.get("metric") or (positional[2] if len(positional) >= 3 else "rows")).strip().lower()
-        day_hint = options.get("day") or (positional[3] if len(positional) >= 4 else None)
+        option = options.get
+        padded = self._pad_positional(positional, 4)
+        limit_text = option("limit") or padded[0]
+        minutes_text = option("minutes") or padded[1]
+        metric = (option("metric") or padded[2] or "rows").strip().lower()
+        day_hint = option("day") or padded[3]
 
         if limit_text:
             try:
@@ -729,7 +908,7 @@ class TelegramActionRouter:
         if day_error:
             return self._render_command_result(day_error)
 
-        output = await asyncio.to_thread(
+        output = await self._run_ops(
             self._ops_runner.collect_top_symbols,
             trading_day=day_override,
             limit=max(1, min(30, limit)),
@@ -751,11 +930,9 @@ class TelegramActionRouter:
         trading_day: str | None,
     ) -> CallbackDispatchResult:
         if not args:
-            return self._render_command_result(
-                "<b>❌ 參數錯誤</b>\n結論：缺少 symbol\n下一步：例 /symbol HK.00700 20"
-            )
+            return self._render_command_result(_SYMBOL_MISSING_TEXT)
         try:
-            positional, options = self._split_option_args(args=args, allowed={"last", "day"})
+            positional, options = self._split_option_args(args=args, allowed=_SYMBOL_OPTS)
         except ValueError:
             return self._render_command_result(
                 "<b>❌ 參數錯誤</b>\n"
@@ -763,20 +940,19 @@ class TelegramActionRouter:
                 "下一步：例 /symbol HK.00700 --last 20 --day 20260220"
             )
         if not positional:
-            return self._render_command_result(
-                "<b>❌ 參數錯誤</b>\n結論：缺少 symbol\n下一步：例 /symbol HK.00700 20"
-            )
+            return self._render_command_result(_SYMBOL_MISSING_TEXT)
         if len(positional) > 3:
             return self._render_command_result(
                 "<b>❌ 參數錯誤</b>\n結論：參數過多\n下一步：例 /symbol HK.00700 20 20260220"
             )
 
         symbol = positional[0].strip().upper()
-        if not _SYMBOL_RE.match(symbol):
+        if not _SYMBOL_MATCH(symbol):
             return self._render_command_result(
                 "<b>❌ 參數錯誤</b>\n結論：symbol 格式不正確\n下一步：例 /symbol HK.00700 20"
             )
-        last_text = options.get("last") or (positional[1] if len(positional) >= 2 else "")
+        padded = self._pad_positional(positional, 3)
+        last_text = options.get("last") or padded[1]
         if last_text:
             try:
                 last = int(last_text)
@@ -784,20 +960,21 @@ class TelegramActionRouter:
                 return self._render_command_result(
                     "<b>❌ 參數錯誤</b>\n結論：last 需為整數\n下一步：例 /symbol HK.00700 20"
                 )
+            last = 1 if last < 1 else 100 if last > 100 else last
         else:
             last = 20
         day_override, day_error = self._resolve_command_day(
-            day_hint=options.get("day") or (positional[2] if len(positional) >= 3 else None),
+            day_hint=options.get("day") or padded[2],
             trading_day=trading_day,
         )
         if day_error:
             return self._render_command_result(day_error)
 
-        output = await asyncio.to_thread(
+        output = await self._run_ops(
             self._ops_runner.collect_symbol_ticks,
             symbol=symbol,
             trading_day=day_override,
-            last=max(1, min(100, last)),
+            last=last,
         )
         if not output:
             output = (
@@ -807,44 +984,53 @@ class TelegramActionRouter:
             )
         return self._render_command_result(output, escape_html=True)
 
-    def _render_help_text(self) -> str:
-        return (
-            "<b>🤖 可用指令</b>\n"
-            "1) /db_stats [YYYYMMDD] 或 /db_stats --day YYYYMMDD\n"
-            "2) /top_symbols [limit] [minutes] [rows|turnover|volume] [YYYYMMDD]\n"
-            "   也可用 --limit/--minutes/--metric/--day\n"
-            "3) /symbol &lt;SYMBOL&gt; [last] [YYYYMMDD]（支援 --last/--day）\n"
-            f"4) 日期查詢最遠可回看 {self._command_max_lookback_days} 天\n"
-            "下一步：例 /top_symbols --limit 10 --minutes 15 --metric rows --day 20260220"
-        )
-
     def _render_command_result(self, text: str, *, escape_html: bool = False) -> CallbackDispatchResult:
-        rendered_text = escape(text) if escape_html else text
-        rendered, _ = truncate_text(rendered_text)
+        if escape_html:
+            rendered, _ = escape_truncated_text(text)
+        elif len(text) <= TELEGRAM_MAX_MESSAGE_CHARS:
+            rendered = text
+        else:
+            rendered, _ = truncate_text(text)
         return CallbackDispatchResult(
             ack_text=None,
             messages=[RouterMessage(mode="send", kind="COMMAND", text=rendered)],
         )
 
     def _authorize(self, *, chat_id: str, user_id: int | None) -> tuple[bool, str]:
+        key = (chat_id, user_id)
+        cached = self._auth_cache.get(key)
+        if cached is not None:
+            return cached
         if self._allowed_chat_id and chat_id != self._allowed_chat_id:
-            return False, "此 chat 不允許操作"
-        if self._admin_user_ids and (user_id is None or int(user_id) not in self._admin_user_ids):
-            return False, "你沒有操作權限"
-        return True, ""
+            result = (False, "此 chat 不允許操作")
+        elif self._admin_user_ids and (
+            user_id is None
+            or (user_id if type(user_id) is int else int(user_id)) not in self._admin_user_ids
+        ):
+            result = (False, "你沒有操作權限")
+        else:
+            result = (True, "")
+        if len(self._auth_cache) >= _AUTH_CACHE_MAX_ENTRIES:
+            self._auth_cache.clear()
+        self._auth_cache[key] = result
+        return result
 
     def _canonical_command(self, command: str) -> str:
         normalized = command.strip().lower()
-        if normalized == "start":
-            return "help"
-        return normalized
+        return _COMMAND_ALIASES.get(normalized, normalized)
+
+    @staticmethod
+    def _pad_positional(positional: list[str], size: int) -> list[str]:
+        return positional + [""] * (size - len(positional))
 
     def _split_option_args(
         self,
         *,
         args: list[str],
-        allowed: set[str],
+        allowed: frozenset[str],
     ) -> tuple[list[str], dict[str, str]]:
+        if not any("--" in arg for arg in args):
+            return [arg.strip() for arg in args], {}
         positional: list[str] = []
         options: dict[str, str] = {}
         index = 0
@@ -883,58 +1069,66 @@ class TelegramActionRouter:
             return fallback_day, None
         target_day = self._normalize_day(day_hint)
         if target_day is None:
-            return None, (
-                "<b>❌ 參數錯誤</b>\n"
-                "結論：日期需為 YYYYMMDD（亦可用 YYYY-MM-DD）\n"
-                "下一步：例 --day 20260220"
-            )
+            return None, _DAY_FORMAT_ERROR_TEXT
         if fallback_day is None:
             return target_day, None
-        today = datetime.strptime(fallback_day, "%Y%m%d").date()
-        candidate = datetime.strptime(target_day, "%Y%m%d").date()
+        today = _parse_yyyymmdd(fallback_day)
+        candidate = _parse_yyyymmdd(target_day)
         delta_days = (today - candidate).days
         if delta_days < 0:
-            return None, (
-                "<b>❌ 日期超出範圍</b>\n"
-                f"結論：不可查詢未來日期（today={fallback_day}）\n"
-                "下一步：請改查今天或更早的交易日"
-            )
+            return None, _FUTURE_DAY_ERROR_TEMPLATE.format(today=fallback_day)
         if delta_days > self._command_max_lookback_days:
-            return None, (
-                "<b>❌ 日期超出範圍</b>\n"
-                f"結論：最多只允許回看 {self._command_max_lookback_days} 天\n"
-                f"下一步：請改查 {fallback_day} 往前 {self._command_max_lookback_days} 天內資料"
+            return None, _LOOKBACK_ERROR_TEMPLATE.format(
+                today=fallback_day, lookback_days=self._command_max_lookback_days
             )
         return target_day, None
 
     def _normalize_day(self, value: str | None) -> str | None:
         if not value:
             return None
-        normalized = value.strip().replace("-", "").replace("/", "")
-        if _DAY_RE.match(normalized):
+        normalized = value.strip()
+        if len(normalized) != 8:
+            # An eight-character value with separators can never normalise to eight digits.
+            normalized = normalized.replace("-", "").replace("/", "")
+        if len(normalized) == 8 and normalized.isascii() and normalized.isdigit():
             return normalized
         return None
 
     def _within_command_rate_limit(self, user_id: int) -> bool:
+        # The bucket keeps only the last `limit` hits, so the oldest one decides whether the
+        # trailing 60s window is full.
         now = time.monotonic()
-        bucket = self._command_hits.setdefault(user_id, deque())
-        while bucket and (now - bucket[0]) >= 60.0:
-            bucket.popleft()
-        if len(bucket) >= self._command_rate_limit_per_min:
+        self._command_checks += 1
+        if self._command_checks % _RATE_LIMIT_SWEEP_EVERY == 0:
+            self._sweep_command_hits(now)
+        try:
+            bucket = self._command_hits[user_id]
+        except KeyError:
+            bucket = self._command_hits[user_id] = deque(maxlen=self._command_rate_limit_per_min)
+        if len(bucket) == bucket.maxlen and now - bucket[0] < 60.0:
             return False
         bucket.append(now)
         return True
 
+    def _sweep_command_hits(self, now: float) -> None:
+        stale = [uid for uid, bucket in self._command_hits.items() if now - bucket[-1] >= 60.0]
+        for uid in stale:
+            del self._command_hits[uid]
 
-def summarize_alert_counts(events: Sequence[Any], *, trading_day: str) -> list[tuple[str, int]]:
-    counter: Counter[str] = Counter()
+
+def _countable_alert_codes(events: Sequence[Any], trading_day: str) -> Iterator[str]:
     for event in events:
-        day = str(getattr(event, "trading_day", ""))
-        if trading_day and day != trading_day:
+        if trading_day and str(getattr(event, "trading_day", "")) != trading_day:
             continue
-        code = str(getattr(event, "code", "UNKNOWN")).upper()
-        severity = str(getattr(event, "severity", ""))
-        if "OK" in severity:
+        if "OK" in str(getattr(event, "severity", "")):
             continue
-        counter[code] += 1
-    return counter.most_common(5)
+        yield str(getattr(event, "code", "UNKNOWN"))
+
+
+def summarize_alert_counts(events: Sequence[Any], *, trading_day: str) -> list[tuple[str, int]]:
+    counter = Counter(_countable_alert_codes(events, trading_day))
+    # Upper-case once per distinct code rather than once per event.
+    folded: Counter[str] = Counter()
+    for code, count in counter.items():
+        folded[code.upper()] += count
+    return folded.most_common(5)
@@ -3,11 +3,13 @@ from __future__ import annotations
 import os
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from html import escape
 from typing import Any, Sequence
 
 TELEGRAM_MAX_MESSAGE_CHARS = 4096
 _CALLBACK_MAX_BYTES = 64
+_TRUNCATED_SUFFIX = "\n... 內容已截斷，請用 🧾/🗃 看更多。"
 
 
 @dataclass(frozen=True)
@@ -332,9 +334,26 @@ def truncate_text(text: str, *, max_chars: int = TELEGRAM_MAX_MESSAGE_CHARS) ->
     limit = max(1, int(max_chars))
     if len(text) <= limit:
         return text, False
-    suffix = "\n... 內容已截斷，請用 🧾/🗃 看更多。"
-    keep = max(0, limit - len(suffix))
-    return text[:keep] + suffix, True
+    keep = max(0, limit - len(_TRUNCATED_SUFFIX))
+    return text[:keep] + _TRUNCATED_SUFFIX, True
+
+
+def escape_truncated_text(
+    text: str, *, max_chars: int = TELEGRAM_MAX_MESSAGE_CHARS
+) -> tuple[str, bool]:
+    # Truncate before escaping so discarded text is never escaped, then cut back to an entity
+    # boundary when escaping pushed the kept part over the limit.
+    limit = max(1, int(max_chars))
+    if len(text) <= limit:
+        escaped = escape(text)
+        if len(escaped) <= limit:
+            return escaped, False
+    keep = max(0, limit - len(_TRUNCATED_SUFFIX))
+    body = escape(text[:keep])[:keep]
+    amp = body.rfind("&")
+    if amp != -1 and ";" not in body[amp:]:
+        body = body[:amp]
+    return body + _TRUNCATED_SUFFIX, True
 
 
 def render_db_status_from_snapshot(*, snapshot: Any) -> str:
@@ -354,31 +373,37 @@ def render_db_status_from_snapshot(*, snapshot: Any) -> str:
     )
 
 
+_SOP_STEPS = {
+    "PERSIST_STALL": (
+        "先確認是否真的停寫",
+        "看最近 20 分鐘日誌，確認 queue 是否持續上升",
+        "看 DB max_ts 是否前進；若未前進再看 service 狀態",
+    ),
+    "SQLITE_BUSY": (
+        "先確認是否鎖競爭",
+        "看 sqlite_busy 是否連續出現並拖慢 persist/min",
+        "若持續 >10 分鐘，再排查並行寫入或 I/O 壓力",
+    ),
+    "DISCONNECT": (
+        "先確認連線中斷範圍",
+        "看 OpenD / collector service 是否 active",
+        "觀察是否出現 RECOVERED，若無則依 runbook 重啟服務",
+    ),
+    "HEALTH": (
+        "先看健康趨勢",
+        "先按 🧾 再按 🗃，判斷是延遲問題還是停寫",
+        "確認是否需要人工介入（通常盤前/盤後可先觀察）",
+    ),
+}
+
+
 def render_sop(*, code: str) -> str:
-    normalized = code.strip().upper() or "HEALTH"
-    mapping = {
-        "PERSIST_STALL": (
-            "先確認是否真的停寫",
-            "看最近 20 分鐘日誌，確認 queue 是否持續上升",
-            "看 DB max_ts 是否前進；若未前進再看 service 狀態",
-        ),
-        "SQLITE_BUSY": (
-            "先確認是否鎖競爭",
-            "看 sqlite_busy 是否連續出現並拖慢 persist/min",
-            "若持續 >10 分鐘，再排查並行寫入或 I/O 壓力",
-        ),
-        "DISCONNECT": (
-            "先確認連線中斷範圍",
-            "看 OpenD / collector service 是否 active",
-            "觀察是否出現 RECOVERED，若無則依 runbook 重啟服務",
-        ),
-        "HEALTH": (
-            "先看健康趨勢",
-            "先按 🧾 再按 🗃，判斷是延遲問題還是停寫",
-            "確認是否需要人工介入（通常盤前/盤後可先觀察）",
-        ),
-    }
-    title, step1, step2 = mapping.get(normalized, mapping["HEALTH"])
+    return _render_sop_cached(code.strip().upper() or "HEALTH")
+
+
+@lru_cache(maxsize=64)
+def _render_sop_cached(normalized: str) -> str:
+    title, step1, step2 = _SOP_STEPS.get(normalized, _SOP_STEPS["HEALTH"])
     return "\n".join(
         [
             "<b>🧯 建議/處置</b>",
@@ -425,6 +450,16 @@ def render_top_anomalies(*, pairs: Sequence[tuple[str, int]]) -> str:
     )
 
 
+def callback_data_fits(data: str) -> bool:
+    # A character is 1-4 UTF-8 bytes, so only mid-length non-ASCII data needs encoding.
+    size = len(data)
+    if size > _CALLBACK_MAX_BYTES:
+        return False
+    if size * 4 <= _CALLBACK_MAX_BYTES or data.isascii():
+        return True
+    return len(data.encode("utf-8")) <= _CALLBACK_MAX_BYTES
+
+
 def callback_data_len_ok(reply_markup: dict[str, Any] | None) -> bool:
     if not reply_markup:
         return True
@@ -438,7 +473,7 @@ def callback_data_len_ok(reply_markup: dict[str, Any] | None) -> bool:
             if not isinstance(button, dict):
                 continue
             callback_data = str(button.get("callback_data", ""))
-            if len(callback_data.encode("utf-8")) > _CALLBACK_MAX_BYTES:
+            if not callback_data_fits(callback_data):
                 return False
     return True
 
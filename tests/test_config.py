@@ -79,6 +79,7 @@ def test_config_from_env_defaults(monkeypatch):
     assert cfg.telegram_action_command_timeout_sec == 10.0
     assert cfg.telegram_action_command_allowlist == ["help", "db_stats", "top_symbols", "symbol"]
     assert cfg.telegram_action_command_max_lookback_days == 30
+    assert cfg.telegram_action_ops_pool_size == 4
 
 
 def test_config_bool_and_list_parsing(monkeypatch):
@@ -136,6 +137,7 @@ def test_config_parses_telegram_env(monkeypatch):
     monkeypatch.setenv("TG_ACTION_COMMAND_TIMEOUT_SEC", "12")
     monkeypatch.setenv("TG_ACTION_COMMAND_ALLOWLIST", "help,db_stats,symbol")
     monkeypatch.setenv("TG_ACTION_COMMAND_MAX_LOOKBACK_DAYS", "45")
+    monkeypatch.setenv("TG_ACTION_OPS_POOL_SIZE", "6")
 
     cfg = Config.from_env()
     assert cfg.telegram_enabled is True
@@ -165,6 +167,7 @@ def test_config_parses_telegram_env(monkeypatch):
     assert cfg.telegram_action_command_timeout_sec == 12.0
     assert cfg.telegram_action_command_allowlist == ["help", "db_stats", "symbol"]
     assert cfg.telegram_action_command_max_lookback_days == 45
+    assert cfg.telegram_action_ops_pool_size == 6
 
 
 def test_config_ignores_legacy_telegram_aliases(monkeypatch):
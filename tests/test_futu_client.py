@@ -168,6 +168,7 @@ def build_config(**overrides) -> Config:
         telegram_action_command_timeout_sec=10.0,
         telegram_action_command_allowlist=["help", "db_stats", "top_symbols", "symbol"],
         telegram_action_command_max_lookback_days=30,
+        telegram_action_ops_pool_size=4,
         instance_id="",
         log_level="INFO",
     )